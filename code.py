@@ -3,6 +3,7 @@
 #
 # SPDX-License-Identifier: Unlicense
 
+import gc
 import ssl
 import os
 import time
@@ -15,30 +16,92 @@ import bitmaptools
 import displayio
 import gifio
 import jpegio
-import ulab.numpy as np
 import analogio
 import board
+import storage
 import adafruit_pycamera
 
+# Network/time setup states, advanced one step at a time from the main loop
+WIFI_IDLE = 0
+WIFI_TIMEZONE = 1
+WIFI_NTP = 2
+WIFI_DONE = 3
+
 # Global variables
 pycam = None
 last_frame = None
-onionskin = None
+scratch_bitmap = None  # Shared by the stop-motion onion skin and the gallery fallback
+scratch_bitmap_dirty = False  # Set by every draw into scratch_bitmap; cleared by a fill
 timelapse_remaining = None
 timelapse_timestamp = None
+_last_status_text = None  # Last text written to the timelapse status label
+_last_label_repaint = 0  # time.monotonic() of the last forced timelapse label repaint
 battery_pin = None
-voltage_history = []
+ewma_voltage = None
 last_recorded_time = 0
 curr_setting = 0
 jpeg_decoder = None
+wifi_state = WIFI_IDLE
+wifi_retry_time = 0  # time.monotonic() at which the next network step may run
+wifi_failures = 0
+wifi_pool = None
+wifi_utc_offset = 0
+_sd_present = False  # Cached SD mount state, updated on card-detect edges
+sd_mount_attempt = None  # Failed mount attempts for a pending insertion, or None
+sd_mount_retry_time = 0  # time.monotonic() at which the next mount attempt is due
 
 # Gallery state variables
 gallery_mode = False
 gallery_images = []
+gallery_scanned = False  # True while gallery_images matches the mounted SD card
 gallery_index = 0
-gallery_image_buffer = None
+gallery_ext = ""  # Lower-case extension of gallery_images[gallery_index]
 gallery_zoom_level = 1  # 1 = scale 1 (320x240), 2 = scale 2 (160x120)
 
+# Most detailed decode of the current gallery JPEG, reused when zooming
+jpeg_cache_file = None
+jpeg_cache_scale = None
+jpeg_cache_bitmap = None
+
+# Smoothing factor for the battery voltage moving average (~10-sample window)
+EWMA_ALPHA = 0.2
+
+# Battery ADC conversion: 16-bit reading, 3.3V reference, 1/2 voltage divider
+ADC_TO_VOLTS = (3.3 * 2) / 65535
+
+NS_PER_SECOND = 1_000_000_000
+
+# Print a progress dot per recorded GIF frame (blocks on serial output)
+DEBUG_GIF = False
+
+# Seconds wifi.radio.connect() may block (it is attempted once), the first NTP
+# retry delay (doubled after each failure), and NTP failures allowed
+WIFI_CONNECT_TIMEOUT = 5
+WIFI_RETRY_INTERVAL = 30
+WIFI_MAX_FAILURES = 3
+
+# Seconds of preview before the first network step, and the timeout for the
+# timezone lookup and NTP sockets
+WIFI_START_DELAY = 5
+WIFI_SOCKET_TIMEOUT = 2
+
+# Free heap (bytes) below which gallery navigation forces a garbage collection
+GC_FREE_THRESHOLD = 20000
+
+# Mount attempts made after an SD card is inserted before giving up
+SD_MOUNT_ATTEMPTS = 3
+
+# Minimum seconds between forced re-paints of the timelapse labels
+LABEL_REPAINT_INTERVAL = 1
+
+# Reciprocals of the battery_percentage() segment widths
+_INV_0_5 = 1 / 0.5
+_INV_0_2 = 1 / 0.2
+_INV_0_3 = 1 / 0.3
+
+# Downscale divisor for each jpegio decode scale 0, 1, 2, 3
+_SCALE_FACTORS = (1, 2, 4, 8)
+
 # Settings navigation array
 SETTINGS = (
     None,
@@ -50,57 +113,120 @@ SETTINGS = (
     "timelapse_rate",
 )
 
+def _settings_steps(step, skip=None):
+    """Build a table mapping each SETTINGS index to its neighbour in step direction."""
+    table = []
+    for i in range(len(SETTINGS)):
+        j = (i + step) % len(SETTINGS)
+        if skip is not None and SETTINGS[j] == skip:
+            j = (j + step) % len(SETTINGS)
+        table.append(j)
+    return tuple(table)
+
+# Precomputed setting transitions; timelapse_rate is only reachable in LAPS mode
+NEXT_LAPS = _settings_steps(1)
+PREV_LAPS = _settings_steps(-1)
+NEXT_NOLAPS = _settings_steps(1, skip="timelapse_rate")
+PREV_NOLAPS = _settings_steps(-1, skip="timelapse_rate")
+
 def setup_wifi_and_time():
-    """Initialize WiFi connection and synchronize time via NTP."""
-    utc_offset = os.getenv("UTC_OFFSET")
-    tz = os.getenv("TZ")
-    ssid = os.getenv("CIRCUITPY_WIFI_SSID")
-    password = os.getenv("CIRCUITPY_WIFI_PASSWORD")
-
-    if not ssid or not password:
-        print("Wifi config not found in settings.toml. Time not set.")
+    """Advance WiFi connection and NTP time sync by one step.
+
+    Called from the main loop so the camera is usable while the network comes
+    up. A failed connect is not retried, so a camera with no reachable access
+    point only pays for it once; a failed NTP sync is retried with a doubling
+    interval starting at WIFI_RETRY_INTERVAL seconds.
+    """
+    global wifi_state, wifi_pool, wifi_utc_offset
+
+    if wifi_state == WIFI_DONE or time.monotonic() < wifi_retry_time:
         return
 
-    print(f"Connecting to {ssid}")
+    # Network steps block, so never run them while the user is busy
+    if gallery_mode or timelapse_remaining is not None or not pycam.shutter_button.value:
+        return
 
-    try:
-        wifi.radio.connect(ssid, password)
-
-        if wifi.radio.connected:
-            print(f"Connected to {ssid}!")
-            print("My IP address is", wifi.radio.ipv4_address)
-            pool = socketpool.SocketPool(wifi.radio)
-
-            # Get timezone offset if not manually set
-            if utc_offset is None and tz:
-                try:
-                    requests = adafruit_requests.Session(pool, ssl.create_default_context())
-                    response = requests.get(f"http://worldtimeapi.org/api/timezone/{tz}")
-                    response_as_json = response.json()
-                    utc_offset = response_as_json["raw_offset"] + response_as_json["dst_offset"]
-                    print(f"UTC_OFFSET: {utc_offset}")
-                except Exception as e:
-                    print(f"Failed to get timezone info: {e}")
-                    utc_offset = 0
-            elif utc_offset:
-                utc_offset = int(utc_offset)
-            else:
-                utc_offset = 0
+    if wifi_state == WIFI_IDLE:
+        ssid = os.getenv("CIRCUITPY_WIFI_SSID")
+        password = os.getenv("CIRCUITPY_WIFI_PASSWORD")
 
-            # Synchronize time via NTP
+        if not ssid or not password:
+            print("Wifi config not found in settings.toml. Time not set.")
+            wifi_state = WIFI_DONE
+            return
+
+        print(f"Connecting to {ssid}")
+        try:
+            wifi.radio.connect(ssid, password, timeout=WIFI_CONNECT_TIMEOUT)
+        except Exception as e:
+            print(f"WiFi connection error: {e}")
+
+        if not wifi.radio.connected:
+            print("Wifi failed to connect. Time not set.")
+            wifi_state = WIFI_DONE
+            return
+
+        print(f"Connected to {ssid}!")
+        print("My IP address is", wifi.radio.ipv4_address)
+        wifi_pool = socketpool.SocketPool(wifi.radio)
+        wifi_state = WIFI_TIMEZONE
+
+    elif wifi_state == WIFI_TIMEZONE:
+        utc_offset = os.getenv("UTC_OFFSET")
+        tz = os.getenv("TZ")
+
+        # Get timezone offset if not manually set
+        if utc_offset is None and tz:
             try:
-                ntp = adafruit_ntp.NTP(
-                    pool, server="pool.ntp.org", tz_offset=utc_offset // 3600
+                requests = adafruit_requests.Session(wifi_pool, ssl.create_default_context())
+                response = requests.get(
+                    f"http://worldtimeapi.org/api/timezone/{tz}", timeout=WIFI_SOCKET_TIMEOUT
                 )
-                print(f"ntp time: {ntp.datetime}")
-                rtc.RTC().datetime = ntp.datetime
+                response_as_json = response.json()
+                utc_offset = response_as_json["raw_offset"] + response_as_json["dst_offset"]
+                print(f"UTC_OFFSET: {utc_offset}")
             except Exception as e:
-                print(f"NTP sync failed: {e}")
+                print(f"Failed to get timezone info: {e}")
+                utc_offset = 0
+        elif utc_offset:
+            utc_offset = int(utc_offset)
         else:
-            print("Wifi failed to connect. Time not set.")
+            utc_offset = 0
 
-    except Exception as e:
-        print(f"WiFi connection error: {e}")
+        wifi_utc_offset = utc_offset
+        wifi_state = WIFI_NTP
+
+    elif wifi_state == WIFI_NTP:
+        # Synchronize time via NTP
+        try:
+            ntp = adafruit_ntp.NTP(
+                wifi_pool,
+                server="pool.ntp.org",
+                tz_offset=wifi_utc_offset // 3600,
+                socket_timeout=WIFI_SOCKET_TIMEOUT,
+            )
+            print(f"ntp time: {ntp.datetime}")
+            rtc.RTC().datetime = ntp.datetime
+        except Exception as e:
+            print(f"NTP sync failed: {e}")
+            wifi_step_failed()
+            return
+
+        wifi_state = WIFI_DONE
+        wifi_pool = None
+
+def wifi_step_failed():
+    """Schedule a backed-off retry of the current network step, or give up."""
+    global wifi_state, wifi_retry_time, wifi_failures, wifi_pool
+
+    wifi_failures += 1
+    if wifi_failures >= WIFI_MAX_FAILURES:
+        print("Giving up on network. Time not set.")
+        wifi_state = WIFI_DONE
+        wifi_pool = None
+        return
+
+    wifi_retry_time = time.monotonic() + WIFI_RETRY_INTERVAL * 2 ** (wifi_failures - 1)
 
 def init_battery_monitoring():
     """Initialize battery monitoring hardware."""
@@ -108,24 +234,26 @@ def init_battery_monitoring():
     battery_pin = analogio.AnalogIn(board.BATTERY_MONITOR)
 
 def get_battery_voltage():
-    """Get current battery voltage averaged over last 10 readings."""
+    """Get current battery voltage as an exponentially weighted moving average."""
+    global ewma_voltage
     raw_value = battery_pin.value
-    voltage = (raw_value / 65535) * 3.3 * 2
-    voltage_history.append(voltage)
-    if len(voltage_history) > 10:
-        voltage_history.pop(0)
-    return sum(voltage_history) / len(voltage_history)
+    voltage = raw_value * ADC_TO_VOLTS
+    if ewma_voltage is None:
+        ewma_voltage = voltage
+    else:
+        ewma_voltage = EWMA_ALPHA * voltage + (1 - EWMA_ALPHA) * ewma_voltage
+    return ewma_voltage
 
 def battery_percentage(voltage):
     """Convert battery voltage to percentage estimate."""
     if voltage >= 4.2:
         return 100
     elif voltage >= 3.7:
-        return int((voltage - 3.7) / 0.5 * 100)
+        return int((voltage - 3.7) * _INV_0_5 * 100)
     elif voltage >= 3.5:
-        return int((voltage - 3.5) / 0.2 * 25)
+        return int((voltage - 3.5) * _INV_0_2 * 25)
     elif voltage >= 3.2:
-        return int((voltage - 3.2) / 0.3 * 25)
+        return int((voltage - 3.2) * _INV_0_3 * 25)
     else:
         return 0
 
@@ -141,39 +269,25 @@ def update_battery_status():
     return None
 
 def is_sd_card_available():
-    """Check if SD card is actually mounted and writable."""
-    try:
-        import os
-
-        # Check if /sd directory exists
-        root_contents = os.listdir('/')
-
-        if 'sd' not in root_contents:
-            return False
+    """Return the cached SD card mount state."""
+    return _sd_present
 
-        # Try to list SD card contents
-        try:
-            sd_contents = os.listdir('/sd')
-        except OSError:
-            return False
+def probe_sd_card(check_writable=False):
+    """Check if SD card is actually mounted (and optionally has free space)."""
+    # boot.py always creates the /sd mount point, so os.stat('/sd') would
+    # succeed even without a card; ask the VFS for the mount instead.
+    try:
+        storage.getmount('/sd')
+    except OSError:
+        return False
 
-        # Try to get filesystem stats
-        try:
-            stat = os.statvfs('/sd')
-            if stat[3] > 0:  # f_bavail (available blocks)
-                return True
-            else:
-                return False
-        except (OSError, AttributeError):
-            # Fall back to simple directory listing test
-            try:
-                os.listdir('/sd')
-                return True
-            except OSError:
-                return False
+    if not check_writable:
+        return True
 
-    except Exception:
-        return False
+    try:
+        return os.statvfs('/sd')[3] > 0  # f_bavail (available blocks)
+    except (OSError, AttributeError):
+        return True
 
 def show_capture_status(success=True, preview_only=False):
     """Standardized status messages for capture operations."""
@@ -192,22 +306,44 @@ def safe_capture_operation(capture_func, *args, **kwargs):
         show_capture_status(preview_only=True)
         return False
 
+    previous_path = last_saved_image_path()
     try:
         result = capture_func(*args, **kwargs)
         show_capture_status(success=True)
+        add_last_saved_image(previous_path)
         return result
     except (TypeError, RuntimeError, OSError) as e:
         print(f"Capture failed: {e}")
         show_capture_status(success=False)
         return False
 
+def get_scratch_bitmap():
+    """Return the shared full-frame scratch bitmap, allocating it on first use."""
+    global scratch_bitmap
+
+    if scratch_bitmap is None:
+        camera = pycam.camera
+        scratch_bitmap = displayio.Bitmap(camera.width, camera.height, 65535)
+    return scratch_bitmap
+
+def release_scratch_bitmap():
+    """Drop the shared scratch bitmap so its memory can be reclaimed."""
+    global scratch_bitmap, scratch_bitmap_dirty
+
+    scratch_bitmap = None
+    scratch_bitmap_dirty = False
+
 def handle_stop_motion_mode():
     """Handle stop motion mode with onion-skin overlay."""
+    global scratch_bitmap_dirty
+
     if pycam.stop_motion_frame != 0:
+        onionskin = get_scratch_bitmap()
         new_frame = pycam.continuous_capture()
         bitmaptools.alphablend(
             onionskin, last_frame, new_frame, displayio.Colorspace.RGB565_SWAPPED
         )
+        scratch_bitmap_dirty = True
         pycam.blit(onionskin)
     else:
         pycam.blit(pycam.continuous_capture())
@@ -221,24 +357,39 @@ def handle_gameboy_mode():
 
 def handle_timelapse_mode():
     """Handle time-lapse photography mode."""
-    global timelapse_remaining, timelapse_timestamp
+    global timelapse_remaining, timelapse_timestamp, _last_status_text, _last_label_repaint
 
     if timelapse_remaining is None:
-        pycam.timelapsestatus_label.text = "STOP"
+        status_text = "STOP"
     else:
         timelapse_remaining = timelapse_timestamp - time.time()
-        pycam.timelapsestatus_label.text = f"{timelapse_remaining}s /    "
+        status_text = f"{timelapse_remaining}s /    "
+
+    submode_text = pycam.timelapse_submode_label.text
+
+    # The preview blit draws straight to the panel over the labels, so they must
+    # be re-painted every frame it runs; without a preview (LowPwr while running)
+    # only re-paint on a text change or once per interval
+    preview = (timelapse_remaining is None) or (submode_text == "HiPwr")
+    now = time.monotonic()
+    repaint = preview or now - _last_label_repaint >= LABEL_REPAINT_INTERVAL
+
+    if status_text != _last_status_text or repaint:
+        pycam.timelapsestatus_label.text = status_text
+        _last_status_text = status_text
 
     # Manually updating the label text ensures proper re-painting
-    pycam.timelapse_rate_label.text = pycam.timelapse_rate_label.text
-    pycam.timelapse_submode_label.text = pycam.timelapse_submode_label.text
+    if repaint:
+        pycam.timelapse_rate_label.text = pycam.timelapse_rate_label.text
+        pycam.timelapse_submode_label.text = submode_text
+        _last_label_repaint = now
 
     # Only preview in high power mode or when stopped
-    if (timelapse_remaining is None) or (pycam.timelapse_submode_label.text == "HiPwr"):
+    if preview:
         pycam.blit(pycam.continuous_capture())
 
     # Adjust display brightness for low power mode
-    if pycam.timelapse_submode_label.text == "LowPwr" and (timelapse_remaining is not None):
+    if submode_text == "LowPwr" and (timelapse_remaining is not None):
         pycam.display.brightness = 0.05
     else:
         pycam.display.brightness = 1
@@ -262,7 +413,13 @@ def handle_camera_modes():
     """Handle different camera capture modes."""
     if pycam.mode_text == "STOP":
         handle_stop_motion_mode()
-    elif pycam.mode_text == "GBOY":
+        return
+
+    # The onion skin is only needed in STOP mode
+    if scratch_bitmap is not None:
+        release_scratch_bitmap()
+
+    if pycam.mode_text == "GBOY":
         handle_gameboy_mode()
     elif pycam.mode_text == "LAPS":
         handle_timelapse_mode()
@@ -320,7 +477,9 @@ def handle_gif_capture():
         f = pycam.open_next_image("gif")
 
         i = 0
-        ft = []
+        # Welford running statistics of the per-frame rate
+        fps_mean = 0.0
+        fps_m2 = 0.0
         pycam._mode_label.text = "RECORDING"  # pylint: disable=protected-access
         pycam.display.refresh()
 
@@ -331,21 +490,38 @@ def handle_gif_capture():
             displayio.Colorspace.RGB565_SWAPPED,
             dither=True,
         ) as g:
-            t00 = t0 = time.monotonic()
-            while (i < 15) or not pycam.shutter_button.value:
+            capture = pycam.continuous_capture
+            add_frame = g.add_frame
+            blit = pycam.blit
+            shutter_button = pycam.shutter_button
+            monotonic_ns = time.monotonic_ns
+            dt_min = dt_max = None
+
+            t00 = t0 = monotonic_ns()
+            while (i < 15) or not shutter_button.value:
                 i += 1
-                _gifframe = pycam.continuous_capture()
-                g.add_frame(_gifframe, 0.12)
-                pycam.blit(_gifframe)
-                t1 = time.monotonic()
-                ft.append(1 / (t1 - t0))
-                print(end=".")
+                _gifframe = capture()
+                add_frame(_gifframe, 0.12)
+                blit(_gifframe)
+                t1 = monotonic_ns()
+                dt = t1 - t0
+                fps = NS_PER_SECOND / dt
+                delta = fps - fps_mean
+                fps_mean += delta / i
+                fps_m2 += delta * (fps - fps_mean)
+                if dt_min is None or dt < dt_min:
+                    dt_min = dt
+                if dt_max is None or dt > dt_max:
+                    dt_max = dt
+                if DEBUG_GIF:
+                    print(end=".")
                 t0 = t1
 
         pycam._mode_label.text = "GIF"  # pylint: disable=protected-access
         print(f"\nfinal size {f.tell()} for {i} frames")
-        print(f"average framerate {i / (t1 - t00)}fps")
-        print(f"best {max(ft)} worst {min(ft)} std. deviation {np.std(ft)}")
+        print(f"average framerate {i * NS_PER_SECOND / (t1 - t00)}fps")
+        fps_std = (fps_m2 / i) ** 0.5
+        print(f"best {NS_PER_SECOND / dt_min} worst {NS_PER_SECOND / dt_max} std. deviation {fps_std}")
         f.close()
         pycam.display.refresh()
         return True
@@ -377,30 +553,53 @@ def handle_jpeg_capture():
     pycam.led_color = prev_led_color
 
 def handle_sd_card_events():
-    """Handle SD card insertion and removal."""
+    """Handle SD card insertion and removal.
+
+    Removal is handled in every mode; insertion and mounting wait until the
+    gallery is closed so the mount messages don't clash with it.
+    """
+    global _sd_present, gallery_scanned, sd_mount_attempt, sd_mount_retry_time
+
     if pycam.card_detect.fell:
         print("SD card removed")
+        _sd_present = False
+        gallery_scanned = False
+        sd_mount_attempt = None
         pycam.unmount_sd_card()
         pycam.display.refresh()
 
+    if gallery_mode:
+        return
+
     if pycam.card_detect.rose:
         print("SD card inserted")
         pycam.display_message("Mounting\nSD Card", color=0xFFFFFF)
+        sd_mount_attempt = 0
+        sd_mount_retry_time = time.monotonic()
 
-        for _ in range(3):
-            try:
-                print("Mounting card")
-                pycam.mount_sd_card()
-                print("Success!")
-                break
-            except OSError as e:
-                print("Retrying!", e)
-                time.sleep(0.5)
-        else:
-            pycam.display_message("SD Card\nFailed!", color=0xFF0000)
-            time.sleep(0.5)
+    # At most one mount attempt per call so the preview keeps running between retries
+    if sd_mount_attempt is None or time.monotonic() < sd_mount_retry_time:
+        return
 
-        pycam.display.refresh()
+    try:
+        print("Mounting card")
+        pycam.mount_sd_card()
+        _sd_present = True
+        gallery_scanned = False
+        sd_mount_attempt = None
+        print("Success!")
+    except OSError as e:
+        sd_mount_attempt += 1
+        if sd_mount_attempt < SD_MOUNT_ATTEMPTS:
+            print("Retrying!", e)
+            # Exponential backoff: 50 ms, 150 ms, 450 ms, ...
+            sd_mount_retry_time = time.monotonic() + 0.05 * 3 ** (sd_mount_attempt - 1)
+            return
+        sd_mount_attempt = None
+        pycam.display_message("SD Card\nFailed!", color=0xFF0000)
+        time.sleep(0.5)
+
+    pycam.display.refresh()
 
 def handle_navigation_buttons():
     """Handle directional button presses for settings navigation."""
@@ -421,19 +620,13 @@ def handle_navigation_buttons():
 
     if pycam.right.fell:
         print("RT")
-        curr_setting = (curr_setting + 1) % len(SETTINGS)
-        # Skip timelapse_rate if not in LAPS mode
-        if pycam.mode_text != "LAPS" and SETTINGS[curr_setting] == "timelapse_rate":
-            curr_setting = (curr_setting + 1) % len(SETTINGS)
+        curr_setting = (NEXT_LAPS if pycam.mode_text == "LAPS" else NEXT_NOLAPS)[curr_setting]
         print(SETTINGS[curr_setting])
         pycam.select_setting(SETTINGS[curr_setting])
 
     if pycam.left.fell:
         print("LF")
-        curr_setting = (curr_setting - 1 + len(SETTINGS)) % len(SETTINGS)
-        # Skip timelapse_rate if not in LAPS mode
-        if pycam.mode_text != "LAPS" and SETTINGS[curr_setting] == "timelapse_rate":
-            curr_setting = (curr_setting + 1) % len(SETTINGS)
+        curr_setting = (PREV_LAPS if pycam.mode_text == "LAPS" else PREV_NOLAPS)[curr_setting]
         print(SETTINGS[curr_setting])
         pycam.select_setting(SETTINGS[curr_setting])
 
@@ -486,21 +679,54 @@ def handle_ok_button():
         print(f"Battery: {battery_voltage:.2f}V ({battery_percent}%)")
         pycam.display_message(f"{battery_percent}%", color=0xFFFFFF)
 
+def last_saved_image_path():
+    """Return the path PyCamera recorded for its most recently opened image."""
+    # PyCamera records the path picked by open_next_image()
+    return getattr(pycam, "_last_saved_image_filename", None)  # pylint: disable=protected-access
+
+def add_last_saved_image(previous_path):
+    """Insert the file PyCamera just saved into the sorted gallery list."""
+    global gallery_scanned
+
+    path = last_saved_image_path()
+    if not path:
+        gallery_scanned = False  # unknown name, rescan on next gallery entry
+    elif path != previous_path:  # unchanged if nothing was written
+        add_gallery_image(path)
+
+def add_gallery_image(path):
+    """Insert a newly captured file into the sorted gallery list."""
+    if not gallery_scanned:
+        return  # the next gallery entry rescans the card anyway
+
+    name = path.rsplit("/", 1)[-1]
+
+    # Binary search for the insertion point (CircuitPython has no bisect)
+    lo, hi = 0, len(gallery_images)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if gallery_images[mid] < name:
+            lo = mid + 1
+        else:
+            hi = mid
+    if lo < len(gallery_images) and gallery_images[lo] == name:
+        return  # already listed
+    gallery_images.insert(lo, name)
+
 def scan_gallery_images():
     """Scan SD card for image files and return sorted list."""
-    global gallery_images
+    global gallery_images, gallery_scanned
     gallery_images = []
+    gallery_scanned = False
 
     if not is_sd_card_available():
         print("No SD card available for gallery")
         return []
 
     try:
-        import os
-        files = os.listdir('/sd')
-
-        # Filter for image files (case insensitive)
-        for file in files:
+        # Filter for image files (case insensitive; one lower() per file, since
+        # MicroPython's str.endswith() does not accept a tuple)
+        for file in os.listdir('/sd'):
             file_lower = file.lower()
             if (file_lower.endswith('.jpg') or
                 file_lower.endswith('.jpeg') or
@@ -509,6 +735,7 @@ def scan_gallery_images():
 
         # Sort files by name
         gallery_images.sort()
+        gallery_scanned = True
         print("Found " + str(len(gallery_images)) + " images: " + str(gallery_images))
         return gallery_images
 
@@ -517,17 +744,27 @@ def scan_gallery_images():
         gallery_images = []
         return []
 
+def set_gallery_index(index):
+    """Select a gallery image and cache its lower-case extension."""
+    global gallery_index, gallery_ext
+
+    gallery_index = index
+    if index < len(gallery_images):
+        gallery_ext = gallery_images[index].rsplit('.', 1)[-1].lower()
+    else:
+        gallery_ext = ""
+
 def enter_gallery_mode():
     """Enter gallery browsing mode."""
-    global gallery_mode, gallery_index, gallery_zoom_level
+    global gallery_mode, gallery_zoom_level
 
     print("Entering gallery mode")
     gallery_mode = True
-    gallery_index = 0
     gallery_zoom_level = 1  # Start at zoom level 1 (scale 1 = 320x240)
 
-    # Scan for images
-    images = scan_gallery_images()
+    # Only rescan if the card changed since the last scan; captures are
+    # inserted into the sorted list as they are saved
+    images = gallery_images if gallery_scanned else scan_gallery_images()
 
     if not images:
         pycam.display_message("No Photos", color=0xFFFF00)
@@ -535,38 +772,40 @@ def enter_gallery_mode():
         exit_gallery_mode()
         return
 
+    set_gallery_index(0)
     pycam.display_message("Gallery Mode", color=0x00FF00)
     time.sleep(0.5)
     display_current_image()
 
 def cleanup_gallery_display():
     """Clean up gallery display resources without clearing camera UI."""
-    try:
-        # Force garbage collection to free image memory
-        import gc
-        gc.collect()
-        print("Gallery display cleaned up, memory freed")
+    # Force garbage collection to free image memory
+    gc.collect()
+    print("Gallery display cleaned up, memory freed")
 
-    except Exception as e:
-        print("Error during gallery cleanup: " + str(e))
+def clear_scratch_bitmap():
+    """Fill the scratch bitmap with black, skipping it if already clear."""
+    global scratch_bitmap_dirty
+
+    if scratch_bitmap is None or not scratch_bitmap_dirty:
+        return
+
+    camera = pycam.camera
+    bitmaptools.fill_region(scratch_bitmap, 0, 0, camera.width, camera.height, 0x0000)
+    scratch_bitmap_dirty = False
 
 def exit_gallery_mode():
     """Exit gallery browsing mode and return to camera."""
-    global gallery_mode, gallery_images, gallery_index, gallery_image_buffer
+    global gallery_mode
 
     print("Exiting gallery mode")
     gallery_mode = False
 
-    # Clean up gallery data to free memory
+    # Clean up gallery data to free memory (the sorted file list is kept)
+    clear_jpeg_cache()
+    release_scratch_bitmap()
     cleanup_gallery_display()
-    gallery_images = []
-    gallery_index = 0
-
-    # Clear the gallery image buffer
-    if gallery_image_buffer:
-        for y in range(pycam.camera.height):
-            for x in range(pycam.camera.width):
-                gallery_image_buffer[x, y] = 0x0000
+    set_gallery_index(0)
 
     print("Attempting to restore camera mode...")
 
@@ -583,15 +822,7 @@ def exit_gallery_mode():
         # Force PyCamera to redraw its UI by calling live_preview_mode
         pycam.live_preview_mode()
 
-        # Force a complete display refresh to restore all UI elements
-        pycam.display.refresh()
-        time.sleep(0.2)  # Give more time for full refresh
-
-        # Force PyCamera to update all its labels and UI elements
-        pycam.display.refresh()
-        time.sleep(0.1)
-
-        # One more refresh to ensure everything is properly restored
+        # A single refresh repaints every dirty region, restoring all UI elements
         pycam.display.refresh()
 
         print("Camera mode restored successfully")
@@ -603,25 +834,16 @@ def exit_gallery_mode():
     except Exception as e:
         print("Error restoring camera mode: " + str(e))
 
-def get_current_scale_factor():
-    """Get the current zoom scale factor based on user zoom level."""
-    global gallery_zoom_level
-    return gallery_zoom_level
-
-def load_image_file(filename):
+def load_image_file(filename, ext):
     """Attempt to load an image file into a displayable bitmap."""
-    global gallery_image_buffer
-
     try:
-        filename_lower = filename.lower()
-
-        if filename_lower.endswith('.jpg') or filename_lower.endswith('.jpeg'):
+        if ext in ('jpg', 'jpeg'):
             print("Loading JPEG file: " + str(filename))
             bitmap = load_jpeg_file(filename)
             # JPEG files don't need a palette, so return None for palette
             return bitmap, None
 
-        elif filename_lower.endswith('.gif'):
+        elif ext == 'gif':
             print("Loading GIF file: " + str(filename))
             return load_gif_file(filename)  # Returns (bitmap, palette)
 
@@ -633,6 +855,45 @@ def load_image_file(filename):
         print("Error loading image " + str(filename) + ": " + str(e))
         return None, None
 
+def cache_jpeg(filename, scale, bitmap):
+    """Remember the most detailed decode of the current gallery JPEG."""
+    global jpeg_cache_file, jpeg_cache_scale, jpeg_cache_bitmap
+
+    if jpeg_cache_file == filename and jpeg_cache_scale <= scale:
+        return
+
+    jpeg_cache_file = filename
+    jpeg_cache_scale = scale
+    jpeg_cache_bitmap = bitmap
+
+def clear_jpeg_cache():
+    """Drop the cached gallery JPEG so its memory can be reclaimed."""
+    global jpeg_cache_file, jpeg_cache_scale, jpeg_cache_bitmap
+
+    jpeg_cache_file = None
+    jpeg_cache_scale = None
+    jpeg_cache_bitmap = None
+
+def get_cached_jpeg(filename, scale):
+    """Return filename at the given jpegio scale from the cache, or None.
+
+    The cache holds the most detailed decode seen so far, so zooming out is a
+    downscale in C via bitmaptools.rotozoom; zooming in past it needs a decode.
+    """
+    if jpeg_cache_file != filename or jpeg_cache_scale > scale:
+        return None
+
+    if jpeg_cache_scale == scale:
+        return jpeg_cache_bitmap
+
+    shift = scale - jpeg_cache_scale
+    bitmap = displayio.Bitmap(
+        jpeg_cache_bitmap.width >> shift, jpeg_cache_bitmap.height >> shift, 65535
+    )
+    bitmaptools.rotozoom(bitmap, jpeg_cache_bitmap, scale=1 / (1 << shift))
+    print("Scaled cached JPEG: " + str(filename) + " (scale=" + str(scale) + ")")
+    return bitmap
+
 def load_jpeg_file(filename):
     """Load a JPEG file using jpegio with appropriate scaling."""
     global jpeg_decoder, pycam
@@ -641,6 +902,14 @@ def load_jpeg_file(filename):
         print("JPEG decoder not available")
         return None
 
+    # Use current zoom level from gallery controls (it is the jpegio scale)
+    scale = gallery_zoom_level
+
+    # Zooming on the same file reuses the decoded bitmap instead of re-reading SD
+    cached = get_cached_jpeg(filename, scale)
+    if cached:
+        return cached
+
     try:
         file_path = "/sd/" + filename
 
@@ -648,12 +917,8 @@ def load_jpeg_file(filename):
         original_width, original_height = jpeg_decoder.open(file_path)
         print("JPEG original dimensions: " + str(original_width) + "x" + str(original_height))
 
-        # Use current zoom level from gallery controls
-        scale = get_current_scale_factor()
-
         # Calculate scaled dimensions
-        scale_factors = [1, 2, 4, 8]  # Corresponding to scale 0, 1, 2, 3
-        scale_factor = scale_factors[scale]
+        scale_factor = _SCALE_FACTORS[scale]
         scaled_width = original_width // scale_factor
         scaled_height = original_height // scale_factor
 
@@ -666,6 +931,7 @@ def load_jpeg_file(filename):
         jpeg_decoder.decode(jpeg_bitmap, scale=scale)
 
         print("Successfully loaded and scaled JPEG: " + str(filename))
+        cache_jpeg(filename, scale, jpeg_bitmap)
         return jpeg_bitmap
 
     except Exception as e:
@@ -705,9 +971,9 @@ def display_current_image():
         return
 
     current_file = gallery_images[gallery_index]
-    loaded_bitmap, loaded_palette = load_image_file(current_file)
+    loaded_bitmap, loaded_palette = load_image_file(current_file, gallery_ext)
     if not loaded_bitmap:
-        show_image_info_fallback(current_file)
+        show_image_info_fallback(current_file, gallery_ext)
         return
 
     # --- build the TileGrid ---------------------------------------------------
@@ -721,7 +987,8 @@ def display_current_image():
         )
 
     # --- centre it ------------------------------------------------------------
-    disp_w, disp_h = pycam.display.width, pycam.display.height  # 240 × 240  [oai_citation:0‡Adafruit Learning System](https://learn.adafruit.com/adafruit-memento-camera-board?view=all&utm_source=chatgpt.com)
+    display = pycam.display
+    disp_w, disp_h = display.width, display.height  # 240 × 240  [oai_citation:0‡Adafruit Learning System](https://learn.adafruit.com/adafruit-memento-camera-board?view=all&utm_source=chatgpt.com)
     img_w,  img_h  = loaded_bitmap.width, loaded_bitmap.height
 
     # If the picture is larger than the screen we simply crop the centre.
@@ -736,19 +1003,20 @@ def display_current_image():
     if not hasattr(pycam, "gallery_group"):
         # first time we enter the gallery, create a group sitting on top of the HUD
         pycam.gallery_group = displayio.Group()
-        pycam.display.root_group.append(pycam.gallery_group)
+        display.root_group.append(pycam.gallery_group)
 
     # clear any previous frame from the overlay and add the new one
-    while len(pycam.gallery_group):
-        pycam.gallery_group.pop()
-    pycam.gallery_group.append(tg)
+    group = pycam.gallery_group
+    while len(group):
+        group.pop()
+    group.append(tg)
 
-    pycam.display.refresh()
+    display.refresh()
     print(f"Displayed {current_file} – centred at ({tg.x}, {tg.y})")
 
-def show_image_info_fallback(filename):
+def show_image_info_fallback(filename, ext):
     """Show image information when actual image cannot be displayed."""
-    global gallery_index, gallery_images, gallery_image_buffer
+    global gallery_index, gallery_images
 
     try:
         import os
@@ -758,10 +1026,9 @@ def show_image_info_fallback(filename):
         size_kb = file_size // 1024
 
         # Determine file type
-        filename_lower = filename.lower()
-        if filename_lower.endswith('.jpg') or filename_lower.endswith('.jpeg'):
+        if ext in ('jpg', 'jpeg'):
             format_info = "JPEG (load failed)"
-        elif filename_lower.endswith('.gif'):
+        elif ext == 'gif':
             format_info = "GIF (load failed)"
         else:
             format_info = "Unknown format"
@@ -772,15 +1039,12 @@ def show_image_info_fallback(filename):
         info_text = str(gallery_index + 1) + "/" + str(len(gallery_images)) + "\n" + filename + "\nInfo unavailable"
 
     # Clear the display with a solid color background first
-    if gallery_image_buffer is None:
-        gallery_image_buffer = displayio.Bitmap(pycam.camera.width, pycam.camera.height, 65535)
+    background = get_scratch_bitmap()
 
     # Fill with a dark background
-    for y in range(pycam.camera.height):
-        for x in range(pycam.camera.width):
-            gallery_image_buffer[x, y] = 0x0000  # Black background
+    clear_scratch_bitmap()
 
-    pycam.blit(gallery_image_buffer)
+    pycam.blit(background)
     pycam.display.refresh()  # Force display update
     pycam.display_message(info_text, color=0xFFFFFF)
 
@@ -808,26 +1072,23 @@ def gallery_zoom_out():
 
 def gallery_navigate(direction):
     """Navigate to previous (-1) or next (+1) image in gallery."""
-    global gallery_index, gallery_images
-
     if not gallery_images:
         return
 
     # Clean up previous image from memory before loading new one
-    try:
-        import gc
-        gc.collect()  # Free memory from previous image
-    except Exception:
-        pass
+    clear_jpeg_cache()
+    if gc.mem_free() < GC_FREE_THRESHOLD:
+        gc.collect()  # Only pay for a full collection under memory pressure
 
-    gallery_index += direction
+    index = gallery_index + direction
 
     # Wrap around at boundaries
-    if gallery_index < 0:
-        gallery_index = len(gallery_images) - 1
-    elif gallery_index >= len(gallery_images):
-        gallery_index = 0
+    if index < 0:
+        index = len(gallery_images) - 1
+    elif index >= len(gallery_images):
+        index = 0
 
+    set_gallery_index(index)
     display_current_image()
 
 def handle_all_buttons():
@@ -886,15 +1147,15 @@ def handle_camera_buttons():
 
 def init_camera_system():
     """Initialize camera and related systems."""
-    global pycam, last_frame, onionskin, last_recorded_time, gallery_image_buffer, jpeg_decoder
+    global pycam, last_frame, last_recorded_time, jpeg_decoder
+    global _sd_present
 
     print("Initializing camera system...")
     pycam = adafruit_pycamera.PyCamera()
 
-    # Initialize frame buffers
+    # Initialize frame buffers; the onion skin / gallery scratch bitmap is
+    # allocated on demand by get_scratch_bitmap()
     last_frame = displayio.Bitmap(pycam.camera.width, pycam.camera.height, 65535)
-    onionskin = displayio.Bitmap(pycam.camera.width, pycam.camera.height, 65535)
-    gallery_image_buffer = displayio.Bitmap(pycam.camera.width, pycam.camera.height, 65535)
 
     # Initialize JPEG decoder for gallery
     try:
@@ -904,6 +1165,9 @@ def init_camera_system():
         print("JPEG decoder initialization failed: " + str(e))
         jpeg_decoder = None
 
+    # One-shot probe; afterwards the SD state is tracked via card-detect events
+    _sd_present = probe_sd_card()
+
     # Initialize timing
     last_recorded_time = time.time()
 
@@ -911,17 +1175,24 @@ def init_camera_system():
 
 def main():
     """Main application entry point."""
+    global wifi_retry_time
+
     print("Starting Adafruit MEMENTO Camera...")
 
-    # Initialize all systems
-    setup_wifi_and_time()
+    # Initialize all systems; WiFi and time sync run from the main loop
     init_battery_monitoring()
     init_camera_system()
 
+    # Let the preview come up before the first (blocking) network step
+    wifi_retry_time = time.monotonic() + WIFI_START_DELAY
+
     print("Entering main loop...")
 
     # Main application loop
     while True:
+        # Bring up WiFi / NTP in the background, one step at a time
+        setup_wifi_and_time()
+
         # Update battery status periodically
         update_battery_status()
 
@@ -933,9 +1204,8 @@ def main():
         # Process user input
         handle_all_buttons()
 
-        # Handle SD card events (but not when in gallery mode to avoid conflicts)
-        if not gallery_mode:
-            handle_sd_card_events()
+        # Handle SD card events
+        handle_sd_card_events()
 
 if __name__ == "__main__":
     main()